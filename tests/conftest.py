@@ -1,11 +1,27 @@
+import os
 import pytest
+import uvloop
+import cache
 from sqlalchemy.ext.asyncio import AsyncSession
 from httpx import AsyncClient, ASGITransport
-from app import app
+from app import app, MEDIA_DIR
 from database import Base, engine, SessionLocal as async_session
 from init_db import create_db as create_test_db
 from models import User
 
+IMAGE_PATH = os.path.join(os.path.dirname(__file__), '..', 'static', 'twitter.jpg')
+
+
+@pytest.fixture(scope='session')
+def event_loop_policy():
+    return uvloop.EventLoopPolicy()
+
+
+@pytest.fixture(scope='session')
+def image_bytes():
+    with open(IMAGE_PATH, 'rb') as image:
+        return image.read()
+
 
 @pytest.fixture
 async def create_db():
@@ -19,6 +35,7 @@ async def create_db():
 
 @pytest.fixture
 async def async_app_client(create_db):
+    os.makedirs(MEDIA_DIR, exist_ok=True)
     async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as client:
         yield client
 
@@ -39,6 +56,19 @@ async def user_post_tweet(async_app_client):
     return tweet_id, header
 
 
+@pytest.fixture
+async def liked_tweet_with_media(async_app_client, image_bytes):
+    header = {'api-key': 'test'}
+    files = {'file': ('twitter.jpg', image_bytes, 'image/jpeg')}
+    media_response = await async_app_client.post('/api/medias', files=files)
+    media_id = media_response.json()['media_id']
+    tweet_data = {'tweet_data': 'tweet with media', 'tweet_media_ids': [media_id]}
+    post_tweet = await async_app_client.post('/api/tweets', json=tweet_data, headers=header)
+    tweet_id = post_tweet.json()['tweet_id']
+    await async_app_client.post(f'/api/tweets/{tweet_id}/likes', headers={'api-key': 'test-1'})
+    return tweet_id, media_id, header
+
+
 @pytest.fixture
 async def add_new_user(db_session):
     header = {'api-key': 'test'}
@@ -49,6 +79,33 @@ async def add_new_user(db_session):
     return header, new_user_id
 
 
+class FakeRedis:
+    """In-memory stand-in for the Redis client used by the response cache."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(cache, 'redis_client', redis)
+    return redis
+
+
 def correct_response(response):
     assert response.status_code == 200
     assert 'result' in response.json() and response.json()['result'] is True
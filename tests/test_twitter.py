@@ -1,8 +1,11 @@
 import pytest
-from sqlalchemy import func
+from sqlalchemy import func, text
 from sqlalchemy.future import select
-from models import User, Post
+from models import Like, Media, Post, Subscription, User
 from app import get_user_and_tweet, get_user_by_filter
+from database import engine
+from init_db import upgrade_schema
+from cache import TWEETS_CACHE_KEY, USER_CACHE_KEY
 from fastapi import HTTPException
 from typing import Tuple
 from .conftest import correct_response
@@ -18,6 +21,143 @@ async def test_get_tweets(async_app_client):
         assert all(key in tweet for key in required_keys)
 
 
+@pytest.mark.asyncio
+async def test_get_tweets_values(async_app_client, db_session, liked_tweet_with_media, user_post_tweet):
+    tweet_id, media_id, _ = liked_tweet_with_media
+    plain_tweet_id, _ = user_post_tweet
+    author = await db_session.scalar(select(User).where(User.api_key == 'test'))
+    liker = await db_session.scalar(select(User).where(User.api_key == 'test-1'))
+    media = await db_session.get(Media, media_id)
+    response = await async_app_client.get("/api/tweets")
+    correct_response(response)
+    tweets = {tweet['id']: tweet for tweet in response.json()['tweets']}
+    assert tweets[tweet_id] == {
+        'id': tweet_id,
+        'content': 'tweet with media',
+        'attachments': [media.url],
+        'author': {'id': author.id, 'name': author.name},
+        'likes': [{'user_id': liker.id, 'name': liker.name}],
+    }
+    assert tweets[plain_tweet_id]['attachments'] == []
+    assert tweets[plain_tweet_id]['likes'] == []
+
+
+@pytest.mark.asyncio
+async def test_get_tweets_pages(async_app_client):
+    first_page = await async_app_client.get("/api/tweets", params={'limit': 2})
+    correct_response(first_page)
+    assert len(first_page.json()['tweets']) == 2
+    next_cursor = first_page.json()['next_cursor']
+    assert isinstance(next_cursor, str)
+
+    second_page = await async_app_client.get("/api/tweets", params={'limit': 2, 'cursor': next_cursor})
+    correct_response(second_page)
+    first_ids = {tweet['id'] for tweet in first_page.json()['tweets']}
+    second_ids = {tweet['id'] for tweet in second_page.json()['tweets']}
+    assert second_ids and first_ids.isdisjoint(second_ids)
+
+
+@pytest.mark.asyncio
+async def test_get_all_tweets_without_limit(async_app_client, db_session):
+    posts_count = await db_session.scalar(select(func.count(Post.id)))
+    response = await async_app_client.get("/api/tweets")
+    correct_response(response)
+    assert len(response.json()['tweets']) == posts_count
+    assert response.json()['next_cursor'] is None
+
+
+@pytest.mark.asyncio
+async def test_get_tweets_pages_by_offset(async_app_client):
+    all_tweets = await async_app_client.get("/api/tweets")
+    all_ids = [tweet['id'] for tweet in all_tweets.json()['tweets']]
+    for page in (1, 2):
+        response = await async_app_client.get("/api/tweets", params={'offset': page, 'limit': 3})
+        correct_response(response)
+        assert [tweet['id'] for tweet in response.json()['tweets']] == all_ids[(page - 1) * 3:page * 3]
+
+
+@pytest.mark.asyncio
+async def test_get_tweets_with_large_limit(async_app_client):
+    response = await async_app_client.get("/api/tweets", params={'offset': 1, 'limit': 500})
+    correct_response(response)
+    assert response.json()['next_cursor'] is None
+
+
+@pytest.mark.asyncio
+async def test_fail_get_tweets_with_wrong_cursor(async_app_client):
+    response = await async_app_client.get("/api/tweets", params={'cursor': 'abcd'})
+    assert response.status_code == 400
+    assert 'detail' in response.json() and response.json()['detail'] == 'Invalid cursor'
+
+
+@pytest.mark.asyncio
+async def test_get_tweets_after_created_at_upgrade(async_app_client, user_post_tweet):
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            'ALTER TABLE post ALTER COLUMN created_at DROP DEFAULT, '
+            'ALTER COLUMN created_at DROP NOT NULL, '
+            'ALTER COLUMN created_at TYPE timestamp',
+        ))
+        await conn.run_sync(upgrade_schema)
+        column_type = await conn.scalar(text(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = 'post' AND column_name = 'created_at'",
+        ))
+    assert column_type == 'timestamp with time zone'
+
+    header = {'api-key': 'test'}
+    tweet_data = {'tweet_data': 'tweet after upgrade', 'tweet_media_ids': []}
+    new_tweet = await async_app_client.post('/api/tweets', json=tweet_data, headers=header)
+    response = await async_app_client.get('/api/tweets', params={'limit': 1})
+    correct_response(response)
+    assert response.json()['tweets'][0]['id'] == new_tweet.json()['tweet_id']
+    assert isinstance(response.json()['next_cursor'], str)
+
+
+@pytest.mark.asyncio
+async def test_upgrade_creates_missing_indexes(create_db):
+    async with engine.begin() as conn:
+        await conn.execute(text('DROP INDEX ix_like_post_user'))
+        await conn.run_sync(upgrade_schema)
+        index_count = await conn.scalar(text(
+            "SELECT count(*) FROM pg_indexes WHERE indexname = 'ix_like_post_user'",
+        ))
+    assert index_count == 1
+
+
+@pytest.mark.asyncio
+async def test_upgrade_drops_post_attachments(create_db):
+    async with engine.begin() as conn:
+        await conn.execute(text('ALTER TABLE post ADD COLUMN attachments VARCHAR[]'))
+        await conn.run_sync(upgrade_schema)
+        column_count = await conn.scalar(text(
+            "SELECT count(*) FROM information_schema.columns "
+            "WHERE table_name = 'post' AND column_name = 'attachments'",
+        ))
+    assert column_count == 0
+
+
+@pytest.mark.asyncio
+async def test_upgrade_bounds_api_key_length(create_db):
+    async with engine.begin() as conn:
+        await conn.execute(text('ALTER TABLE "user" ALTER COLUMN api_key TYPE varchar'))
+        await conn.run_sync(upgrade_schema)
+        column_length = await conn.scalar(text(
+            "SELECT character_maximum_length FROM information_schema.columns "
+            "WHERE table_name = 'user' AND column_name = 'api_key'",
+        ))
+    assert column_length == 64
+
+
+@pytest.mark.asyncio
+async def test_fail_upgrade_with_too_long_api_key(create_db):
+    async with engine.begin() as conn:
+        await conn.execute(text('ALTER TABLE "user" ALTER COLUMN api_key TYPE varchar'))
+        await conn.execute(text("UPDATE \"user\" SET api_key = repeat('k', 65) WHERE id = 1"))
+        with pytest.raises(ValueError):
+            await conn.run_sync(upgrade_schema)
+
+
 @pytest.mark.asyncio
 async def test_get_current_user(async_app_client):
     header = {'api-key': "test"}
@@ -73,10 +213,8 @@ async def test_fail_get_missing_user(async_app_client):
 
 
 @pytest.mark.asyncio
-async def test_save_media(async_app_client):
-    get_cat = await async_app_client.get("https://cataas.com/cat")
-    cat_image = get_cat.read()
-    files = {'file': ('cat.jpg', cat_image, 'image/jpeg')}
+async def test_save_media(async_app_client, image_bytes):
+    files = {'file': ('twitter.jpg', image_bytes, 'image/jpeg')}
     response = await async_app_client.post('/api/medias', files=files)
     correct_response(response)
     assert 'media_id' in response.json() and response.json()['media_id'] == 1
@@ -92,13 +230,11 @@ async def test_post_tweet_without_media(async_app_client):
 
 
 @pytest.mark.asyncio
-async def test_post_tweet_with_media(async_app_client, db_session):
+async def test_post_tweet_with_media(async_app_client, db_session, image_bytes):
     header = {'api-key': 'test'}
     post_request = await db_session.execute(select(func.count(Post.id)))
     post_count = post_request.scalar_one()
-    get_cat = await async_app_client.get("https://cataas.com/cat")
-    cat_image = get_cat.read()
-    files = {'file': ('cat.jpg', cat_image, 'image/jpeg')}
+    files = {'file': ('twitter.jpg', image_bytes, 'image/jpeg')}
     media_response = await async_app_client.post('/api/medias', files=files)
     media_id = media_response.json()['media_id']
     tweet_data = {'tweet_data': 'new test tweet', 'tweet_media_ids': [media_id]}
@@ -109,6 +245,14 @@ async def test_post_tweet_with_media(async_app_client, db_session):
     assert new_post_request.scalar_one() == post_count + 1
 
 
+@pytest.mark.asyncio
+async def test_fail_post_tweet_with_unknown_field(async_app_client):
+    header = {'api-key': 'test'}
+    tweet_data = {'tweet_data': 'new test tweet', 'tweet_media_ids': [], 'author_id': 2}
+    response = await async_app_client.post('/api/tweets', json=tweet_data, headers=header)
+    assert response.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_delete_tweet(async_app_client, user_post_tweet):
     tweet_id, header = user_post_tweet
@@ -116,6 +260,33 @@ async def test_delete_tweet(async_app_client, user_post_tweet):
     correct_response(delete_tweet)
 
 
+@pytest.mark.asyncio
+async def test_delete_tweet_with_like_and_media(async_app_client, db_session, liked_tweet_with_media):
+    tweet_id, media_id, header = liked_tweet_with_media
+    delete_tweet = await async_app_client.delete(f"/api/tweets/{tweet_id}", headers=header)
+    correct_response(delete_tweet)
+    likes_count = await db_session.scalar(select(func.count(Like.id)).where(Like.post_id == tweet_id))
+    media_count = await db_session.scalar(select(func.count(Media.id)).where(Media.id == media_id))
+    assert likes_count == 0 and media_count == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_tweet_after_foreign_keys_upgrade(async_app_client, liked_tweet_with_media):
+    tweet_id, _, header = liked_tweet_with_media
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            'ALTER TABLE "like" DROP CONSTRAINT like_post_id_fkey, '
+            'ADD CONSTRAINT like_post_id_fkey FOREIGN KEY (post_id) REFERENCES post (id)',
+        ))
+        await conn.execute(text(
+            'ALTER TABLE media DROP CONSTRAINT media_post_id_fkey, '
+            'ADD CONSTRAINT media_post_id_fkey FOREIGN KEY (post_id) REFERENCES post (id)',
+        ))
+        await conn.run_sync(upgrade_schema)
+    delete_tweet = await async_app_client.delete(f"/api/tweets/{tweet_id}", headers=header)
+    correct_response(delete_tweet)
+
+
 @pytest.mark.asyncio
 async def test_wrong_user_delete_tweet(async_app_client, user_post_tweet):
     tweet_id, header = user_post_tweet
@@ -204,6 +375,15 @@ async def test_repeated_follow_user(async_app_client, db_session, add_new_user):
     assert new_repeated_follower.json()['detail'] == 'You have already subscribed to this user'
 
 
+@pytest.mark.asyncio
+async def test_fail_follow_yourself(async_app_client):
+    header = {'api-key': 'test'}
+    current_user_id = 1
+    response = await async_app_client.post(f"/api/users/{current_user_id}/follow", headers=header)
+    assert response.status_code == 400
+    assert 'detail' in response.json() and response.json()['detail'] == 'You cannot subscribe to yourself'
+
+
 @pytest.mark.asyncio
 async def test_delete_follow_user(async_app_client, db_session, add_new_user):
     header, new_user_id = add_new_user
@@ -221,6 +401,87 @@ async def test_delete_missing_follow_user(async_app_client, db_session, add_new_
     assert delete_follower.json()['detail'] == 'Subscription not found'
 
 
+@pytest.mark.asyncio
+async def test_get_tweets_from_cache(async_app_client, fake_redis):
+    response = await async_app_client.get("/api/tweets")
+    correct_response(response)
+    assert fake_redis.data[TWEETS_CACHE_KEY] == response.content
+    fake_redis.data[TWEETS_CACHE_KEY] = b'{"result":true,"tweets":[],"next_cursor":null}'
+    cached_response = await async_app_client.get("/api/tweets")
+    correct_response(cached_response)
+    assert cached_response.json()['tweets'] == []
+
+
+@pytest.mark.asyncio
+async def test_get_user_from_cache(async_app_client, fake_redis):
+    user_cache_key = USER_CACHE_KEY.format(user_id=2)
+    response = await async_app_client.get("/api/users/2")
+    correct_response(response)
+    assert fake_redis.data[user_cache_key] == response.content
+    fake_redis.data[user_cache_key] = (
+        b'{"result":true,"user":{"id":2,"name":"Cached","followers":[],"following":[]}}'
+    )
+    cached_response = await async_app_client.get("/api/users/2")
+    correct_response(cached_response)
+    assert cached_response.json()['user']['name'] == 'Cached'
+
+
+@pytest.mark.asyncio
+async def test_tweet_changes_invalidate_cache(async_app_client, fake_redis, user_post_tweet):
+    tweet_id, header = user_post_tweet
+    requests = [
+        ('post', f"/api/tweets/{tweet_id}/likes"),
+        ('delete', f"/api/tweets/{tweet_id}/likes"),
+        ('delete', f"/api/tweets/{tweet_id}"),
+    ]
+    for method, url in requests:
+        fake_redis.data[TWEETS_CACHE_KEY] = b'{}'
+        correct_response(await async_app_client.request(method, url, headers=header))
+        assert TWEETS_CACHE_KEY not in fake_redis.data
+
+    fake_redis.data[TWEETS_CACHE_KEY] = b'{}'
+    tweet_data = {'tweet_data': 'new test tweet', 'tweet_media_ids': []}
+    correct_response(await async_app_client.post('/api/tweets', json=tweet_data, headers=header))
+    assert TWEETS_CACHE_KEY not in fake_redis.data
+
+
+@pytest.mark.asyncio
+async def test_follow_changes_invalidate_cache(async_app_client, db_session, fake_redis, add_new_user):
+    header, new_user_id = add_new_user
+    current_user = await db_session.scalar(select(User).where(User.api_key == header['api-key']))
+    user_cache_keys = [
+        USER_CACHE_KEY.format(user_id=current_user.id),
+        USER_CACHE_KEY.format(user_id=new_user_id),
+    ]
+    for method in ('post', 'delete'):
+        fake_redis.data.update(dict.fromkeys(user_cache_keys, b'{}'))
+        response = await async_app_client.request(method, f"/api/users/{new_user_id}/follow", headers=header)
+        correct_response(response)
+        assert not any(key in fake_redis.data for key in user_cache_keys)
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_above_query_arguments_limit(db_session):
+    users = [User(name=f'Bulk User {i}', api_key=f'bulk-{i}') for i in range(150)]
+    db_session.add_all(users)
+    await db_session.flush()
+    user_ids = [user.id for user in users]
+    pairs = [
+        (follower_id, following_id)
+        for follower_id in user_ids
+        for following_id in user_ids
+        if follower_id != following_id
+    ]
+    assert len(pairs) * 2 > 32767
+    await Subscription.bulk_create(db_session, pairs)
+    await Subscription.bulk_create(db_session, pairs[:10])
+    await db_session.commit()
+    subscriptions_count = await db_session.scalar(
+        select(func.count(Subscription.id)).where(Subscription.follower_id.in_(user_ids)),
+    )
+    assert subscriptions_count == len(pairs)
+
+
 @pytest.mark.app_func
 async def test_app_get_user_by_api_key(db_session):
     user = await get_user_by_filter(db=db_session, api_key='test')
@@ -1,5 +1,7 @@
 import os
 import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
 from typing import (
     Any,
     AsyncGenerator,
@@ -9,29 +11,57 @@ from typing import (
 )
 
 from contextlib import asynccontextmanager
+import aiofiles
+import aiofiles.os
+import orjson
 from fastapi import (
     Depends,
     FastAPI,
     File,
     Header,
     HTTPException,
+    Query,
     Request,
     status,
     UploadFile,
 )
-from fastapi.responses import JSONResponse
-from sqlalchemy.exc import IntegrityError
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy import (
+    Text,
+    bindparam,
+    cast,
+    delete,
+    exists,
+    func,
+    literal_column,
+    or_,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import Load, aliased, raiseload
 from werkzeug.utils import secure_filename
-from database import engine, Base, SessionLocal
-from init_db import create_db
+from cache import (
+    TWEETS_CACHE_KEY,
+    TWEETS_CACHE_TTL,
+    USER_CACHE_KEY,
+    close_cache,
+    get_cached,
+    invalidate_cache,
+    set_cached,
+)
+from database import engine, SessionLocal
+from init_db import init_database
 from models import Like, Media, Post, Subscription, User
 from schemas import (
     MediaResponse,
+    PostCursor,
     PostResponse,
     SuccessfulResponse,
+    TweetIn,
     TweetResponse,
     UserResponse,
 )
@@ -41,31 +71,36 @@ from utils import logger, log_function_calls
 @asynccontextmanager
 async def lifespan(application: FastAPI):
     """
-    Initialize the database engine and create initial users, posts, and likes.
+    Prepare the media directory and release the database and cache connections on shutdown.
 
     Args:
         application (FastAPI): An instance of the FastAPI application.
 
     Yields:
         None
+
+    Note:
+        The schema and the initial data are created once per deployment
+        by running init_db.py, so workers start without touching the database.
+        Set RUN_DB_INIT to do it on startup instead, e.g. for a single local process.
     """
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all, checkfirst=True)
-    await create_db(SessionLocal())
+    await aiofiles.os.makedirs(MEDIA_DIR, exist_ok=True)
+    if os.getenv('RUN_DB_INIT', '').lower() in ('1', 'true', 'yes'):
+        await init_database()
     yield
-    await SessionLocal().close()
     await engine.dispose()
+    await close_cache()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 
 @app.exception_handler(Exception)
-async def exception_handler(exc: Exception) -> JSONResponse:
+async def exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
     """Handle exceptions raised by the app."""
     error_type = exc.__class__.__name__
     error_message = str(exc)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=HTTP_STATUS_INTERNAL_SERVER_ERROR,
         content={
             'result': False,
@@ -102,7 +137,97 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 DEFAULT_DB = Depends(get_db)
 API_KEY_HEADER = 'api-key'
 SUCCESS_RESPONSE = {'result': True}
+JSON_MEDIA_TYPE = 'application/json'
 DEFAULT_FILE = File(...)
+MEDIA_DIR = 'media'
+UPLOAD_CHUNK_SIZE = 1 << 16
+PARTIAL_UPLOAD_SUFFIX = '.part'
+
+DEFAULT_FEED_LIMIT = 50
+FEED_LIMIT = Query(None, ge=1)
+FEED_PAGE = Query(1, ge=1, alias='offset')
+
+USER_QUERY = select(User).options(raiseload('*'))
+USER_BY_API_KEY_QUERY = USER_QUERY.where(User.api_key == bindparam('api_key'))
+USER_BY_ID_QUERY = USER_QUERY.where(User.id == bindparam('user_id'))
+FOLLOWERS_QUERY = (
+    select(User.id, User.name)
+    .join(Subscription, Subscription.follower_id == User.id)
+    .where(Subscription.following_id == bindparam('user_id'))
+)
+FOLLOWINGS_QUERY = (
+    select(User.id, User.name)
+    .join(Subscription, Subscription.following_id == User.id)
+    .where(Subscription.follower_id == bindparam('user_id'))
+)
+USER_AND_FOLLOWER_QUERY = USER_QUERY.where(
+    or_(User.api_key == bindparam('api_key'), User.id == bindparam('user_id')),
+)
+USER_EXISTS_QUERY = select(exists().where(User.api_key == bindparam('api_key')))
+USER_AND_TWEET_QUERY = (
+    select(User, Post)
+    .join(Post, true())
+    .options(Load(User).raiseload('*'), Load(Post).raiseload('*'))
+    .where(User.api_key == bindparam('api_key'), Post.id == bindparam('tweet_id'))
+)
+DELETE_OWN_TWEET_QUERY = (
+    delete(Post)
+    .where(
+        Post.id == bindparam('tweet_id'),
+        Post.user_id == select(User.id).where(User.api_key == bindparam('api_key')).scalar_subquery(),
+    )
+    .returning(Post.id)
+    .execution_options(synchronize_session=False)
+)
+ATTACH_MEDIA_QUERY = (
+    update(Media)
+    .where(Media.id.in_(bindparam('media_ids', expanding=True)))
+    .values(post_id=bindparam('attached_post_id'))
+    .execution_options(synchronize_session=False)
+)
+EMPTY_JSON_ARRAY = literal_column("'[]'::json")
+LIKE_USER = aliased(User)
+FEED_LIKES_QUERY = (
+    select(func.coalesce(
+        func.json_agg(func.json_build_object('user_id', Like.user_id, 'name', LIKE_USER.name)),
+        EMPTY_JSON_ARRAY,
+    ))
+    .select_from(Like)
+    .join(LIKE_USER, LIKE_USER.id == Like.user_id)
+    .where(Like.post_id == Post.id)
+    .scalar_subquery()
+)
+FEED_ATTACHMENTS_QUERY = (
+    select(func.coalesce(func.json_agg(Media.url), EMPTY_JSON_ARRAY))
+    .where(Media.post_id == Post.id)
+    .scalar_subquery()
+)
+FEED_QUERY = (
+    select(
+        Post.id,
+        Post.created_at,
+        cast(
+            func.json_build_object(
+                'id', Post.id,
+                'content', Post.content,
+                'attachments', FEED_ATTACHMENTS_QUERY,
+                'author', func.json_build_object('id', User.id, 'name', User.name),
+                'likes', FEED_LIKES_QUERY,
+            ),
+            Text,
+        ).label('tweet'),
+    )
+    .join(User, User.id == Post.user_id)
+    .order_by(Post.created_at.desc(), Post.id.desc())
+    .limit(bindparam('limit'))
+)
+FEED_PAGE_QUERY = FEED_QUERY.offset(bindparam('offset'))
+FEED_AFTER_CURSOR_QUERY = FEED_QUERY.where(
+    tuple_(Post.created_at, Post.id) < tuple_(
+        bindparam('before_created_at', type_=Post.created_at.type),
+        bindparam('before_id', type_=Post.id.type),
+    ),
+)
 
 HTTP_STATUS_NOT_FOUND = 404
 HTTP_STATUS_BAD_REQUEST = 400
@@ -110,6 +235,38 @@ HTTP_STATUS_FORBIDDEN = 403
 HTTP_STATUS_INTERNAL_SERVER_ERROR = 500
 
 
+def encode_cursor(created_at: datetime, post_id: int) -> str:
+    """
+    Encode the position of the tweet in the feed as an opaque cursor.
+
+    Parameters:
+        created_at (datetime): Creation time of the last tweet on the current page.
+        post_id (int): The id of the last tweet on the current page.
+
+    Returns:
+        Cursor pointing to the tweets older than the given one.
+    """
+    position = f'{created_at.isoformat()}|{post_id}'
+    return urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> PostCursor:
+    """
+    Decode a feed cursor into the position of the tweet.
+
+    Parameters:
+        cursor (str): Cursor returned with the previous page of the feed.
+
+    Returns:
+        Position containing the creation time and the id of the tweet.
+    """
+    try:
+        created_at, post_id = urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return PostCursor(before_created_at=created_at, before_id=post_id)
+    except ValueError:
+        raise HTTPException(status_code=HTTP_STATUS_BAD_REQUEST, detail='Invalid cursor')
+
+
 async def get_user_and_tweet(
     tweet_id: int, user_api_key: str, db: AsyncSession,
 ) -> Tuple[User, Post]:
@@ -123,21 +280,30 @@ async def get_user_and_tweet(
 
     Returns:
         Tuple containing the user and the tweet.
-    """
-    current_user = await get_user_by_filter(db=db, api_key=user_api_key)
 
-    query_tweet = select(Post).filter_by(id=tweet_id)
-    tweet = await db.execute(query_tweet)
-    current_tweet = tweet.unique().scalar_one_or_none()
+    Note:
+        Both rows are fetched with one query, the existence of the user
+        is checked separately only when that query finds nothing.
+    """
+    user_and_tweet = await db.execute(
+        USER_AND_TWEET_QUERY, {'api_key': user_api_key, 'tweet_id': tweet_id},
+    )
+    found_row = user_and_tweet.one_or_none()
 
-    if not current_tweet:
+    if found_row is None:
+        user_exists = await db.scalar(USER_EXISTS_QUERY, {'api_key': user_api_key})
+        if not user_exists:
+            raise HTTPException(status_code=HTTP_STATUS_NOT_FOUND, detail='User not found')
         raise HTTPException(status_code=HTTP_STATUS_NOT_FOUND, detail='Tweet not found')
 
+    current_user, current_tweet = found_row
     return current_user, current_tweet
 
 
 async def get_user_by_filter(
-    db: AsyncSession, api_key: Optional[str] = None, user_id: Optional[int] = None,
+    db: AsyncSession,
+    api_key: Optional[str] = None,
+    user_id: Optional[int] = None,
 ) -> User:
     """
     Get a user by their api-key or id.
@@ -150,19 +316,12 @@ async def get_user_by_filter(
     Returns:
         Required user object or None.
     """
-    filters = []
     if api_key:
-        filters.append(User.api_key == api_key)
-    if user_id:
-        filters.append(User.id == user_id)
-    query = (
-        select(User)
-        .options(joinedload(User.followers), joinedload(User.followings))
-        .filter(*filters)
-    )
-    queried_user = await db.execute(query)
+        queried_user = await db.execute(USER_BY_API_KEY_QUERY, {'api_key': api_key})
+    else:
+        queried_user = await db.execute(USER_BY_ID_QUERY, {'user_id': user_id})
 
-    user = queried_user.unique().scalar_one_or_none()
+    user = queried_user.scalar_one_or_none()
 
     if not user:
         raise HTTPException(status_code=HTTP_STATUS_NOT_FOUND, detail='User not found')
@@ -183,9 +342,19 @@ async def get_followers(
 
     Returns:
         Tuple containing the user and the follower of the desired user.
+
+    Note:
+        Both users are fetched with one query and told apart by their attributes.
     """
-    current_user = await get_user_by_filter(db=db, api_key=current_user_api_key)
-    follower = await get_user_by_filter(db=db, user_id=follower_id)
+    queried_users = await db.execute(
+        USER_AND_FOLLOWER_QUERY, {'api_key': current_user_api_key, 'user_id': follower_id},
+    )
+    users = queried_users.scalars().all()
+    current_user = next((user for user in users if user.api_key == current_user_api_key), None)
+    follower = next((user for user in users if user.id == follower_id), None)
+
+    if not current_user or not follower:
+        raise HTTPException(status_code=HTTP_STATUS_NOT_FOUND, detail='User not found')
     return current_user, follower
 
 
@@ -205,32 +374,77 @@ async def get_and_formatted_user(
 
     Note:
         This structure is necessary for correct display on the frontend.
+        Followers and followings are read as plain (id, name) rows,
+        so no Subscription or User objects are built for them.
     """
     user = await get_user_by_filter(db=db, api_key=api_key, user_id=user_id)
-    return user.formatted_data
+    followers = await db.execute(FOLLOWERS_QUERY, {'user_id': user.id})
+    followings = await db.execute(FOLLOWINGS_QUERY, {'user_id': user.id})
+    user_data = user.to_dict()
+    user_data['followers'] = [{'id': row.id, 'name': row.name} for row in followers]
+    user_data['following'] = [{'id': row.id, 'name': row.name} for row in followings]
+    return user_data
 
 
 @app.get('/api/tweets', response_model=PostResponse)
-async def read_tweets(db: AsyncSession = DEFAULT_DB):
+async def read_tweets(
+    db: AsyncSession = DEFAULT_DB,
+    limit: Optional[int] = FEED_LIMIT,
+    page: int = FEED_PAGE,
+    cursor: Optional[str] = None,
+):
     """
-    Get all tweets for the user are sorted from the newest to the oldest.
+    Get tweets sorted from the newest to the oldest, all of them or a page.
 
     Parameters:
         db (AsyncSession): Session with the current database.
+        limit (int): The maximum number of tweets on the page.
+        page (int): The number of the page starting from 1, sent as offset, used without cursor.
+        cursor (str): Cursor of the previous page returned as next_cursor.
 
     Returns:
-        Response object containing successful result status and tweets.
-    """
-    query = (
-        select(Post)
-        .options(joinedload(Post.user), joinedload(Post.likes))
-        .order_by(Post.created_at.desc())
-    )
-    queried_posts = await db.execute(query)
-    all_posts = queried_posts.unique().scalars().all()
-    tweets = [post.formatted_data for post in all_posts]
-    tweets_response = {'tweets': tweets}
-    return {**SUCCESS_RESPONSE, **tweets_response}
+        Response object containing successful result status, tweets
+        and the cursor of the next page.
+
+    Note:
+        Without limit, cursor and page the whole feed is returned, as the
+        frontend expects when pagination is off. It also counts the pages
+        by this response. The frontend sends the page number as offset.
+        The cursor is preferred over offset, because the database
+        can seek straight to it instead of scanning the skipped tweets.
+        Every tweet is built as JSON by Postgres, with its author, likes
+        and attachments aggregated in the query, and embedded into the
+        response as is. The same bytes are sent and cached.
+    """
+    is_whole_feed = limit is None and cursor is None and page == 1
+    if is_whole_feed:
+        cached_tweets = await get_cached(TWEETS_CACHE_KEY)
+        if cached_tweets is not None:
+            return Response(content=cached_tweets, media_type=JSON_MEDIA_TYPE)
+    elif limit is None:
+        limit = DEFAULT_FEED_LIMIT
+
+    query_limit = None if limit is None else limit + 1
+    if cursor:
+        query = FEED_AFTER_CURSOR_QUERY
+        params = {'limit': query_limit, **decode_cursor(cursor).model_dump()}
+    else:
+        query = FEED_PAGE_QUERY
+        params = {'limit': query_limit, 'offset': (page - 1) * (limit or 0)}
+    tweets = []
+    last_row = None
+    has_next_page = False
+    async for row in await db.stream(query, params):
+        if len(tweets) == limit:
+            has_next_page = True
+            continue
+        tweets.append(orjson.Fragment(row.tweet))
+        last_row = row
+    next_cursor = encode_cursor(last_row.created_at, last_row.id) if has_next_page else None
+    tweets_response = orjson.dumps({**SUCCESS_RESPONSE, 'tweets': tweets, 'next_cursor': next_cursor})
+    if is_whole_feed:
+        await set_cached(TWEETS_CACHE_KEY, tweets_response, expire=TWEETS_CACHE_TTL)
+    return Response(content=tweets_response, media_type=JSON_MEDIA_TYPE)
 
 
 @app.get('/api/users/me', response_model=UserResponse)
@@ -251,8 +465,8 @@ async def read_me(db: AsyncSession = DEFAULT_DB, api_key: str = Depends(get_api_
             status_code=HTTP_STATUS_NOT_FOUND, detail='API key required',
         )
     current_user = await get_and_formatted_user(db=db, api_key=api_key)
-    current_user_response = {'user': current_user}
-    return {**SUCCESS_RESPONSE, **current_user_response}
+    current_user_response = {**SUCCESS_RESPONSE, 'user': current_user}
+    return ORJSONResponse(current_user_response)
 
 
 @app.get('/api/users/{id}', response_model=UserResponse)
@@ -268,9 +482,15 @@ async def read_user(id: int, db: AsyncSession = DEFAULT_DB):
         Response object containing successful result status
         and the information about desired user.
     """
+    user_cache_key = USER_CACHE_KEY.format(user_id=id)
+    cached_user = await get_cached(user_cache_key)
+    if cached_user is not None:
+        return Response(content=cached_user, media_type=JSON_MEDIA_TYPE)
+
     user_by_id = await get_and_formatted_user(db=db, user_id=id)
-    user_by_id_response = {'user': user_by_id}
-    return {**SUCCESS_RESPONSE, **user_by_id_response}
+    user_by_id_response = {**SUCCESS_RESPONSE, 'user': user_by_id}
+    await set_cached(user_cache_key, user_by_id_response)
+    return ORJSONResponse(user_by_id_response)
 
 
 @app.post('/api/medias', response_model=MediaResponse)
@@ -285,33 +505,44 @@ async def upload_media(file: UploadFile = DEFAULT_FILE, db: AsyncSession = DEFAU
     Returns:
         Response object containing successful result status
         and id of the uploaded media file.
-    """
-    if not os.path.exists('media'):
-        os.makedirs('media')
 
+    Note:
+        The file is written to a temporary ".part" path and renamed only
+        once it is complete, so the Media row is never created for a
+        partially written file and no connection is held during the upload.
+    """
     if file.filename:
         unique_id = str(uuid.uuid4())
         filename = unique_id + secure_filename(file.filename)
-        file_path = os.path.join('media', filename)
+        file_path = os.path.join(MEDIA_DIR, filename)
+        part_path = file_path + PARTIAL_UPLOAD_SUFFIX
+
+        try:
+            async with aiofiles.open(part_path, 'wb') as buffer:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    await buffer.write(chunk)
+            await aiofiles.os.replace(part_path, file_path)
+        except BaseException:
+            if await aiofiles.os.path.exists(part_path):
+                await aiofiles.os.unlink(part_path)
+            raise
+
         new_media = Media(url=file_path)
         db.add(new_media)
         await db.commit()
 
-        with open(file_path, 'wb') as buffer:
-            buffer.write(await file.read())
-
         new_media_response = {'media_id': new_media.id}
         return {**SUCCESS_RESPONSE, **new_media_response}
 
 
 @app.post('/api/tweets', response_model=TweetResponse)
 @log_function_calls(logger)
-async def create_tweet(request: Request, db: AsyncSession = DEFAULT_DB, api_key: str = Depends(get_api_key)):
+async def create_tweet(tweet: TweetIn, db: AsyncSession = DEFAULT_DB, api_key: str = Depends(get_api_key)):
     """
     Post new tweet with attached media files.
 
     Parameters:
-        request (Request): Request object containing id`s of uploaded media files.
+        tweet (TweetIn): Content of the new tweet and id`s of uploaded media files.
         db (AsyncSession): Session with the current database.
         api_key (str): The API key of the current user.
 
@@ -319,26 +550,18 @@ async def create_tweet(request: Request, db: AsyncSession = DEFAULT_DB, api_key:
         Response object containing successful result status
         and id of new tweet.
     """
-    query = select(User).filter_by(api_key=api_key)
-    user = await db.execute(query)
-    current_user = user.unique().scalar_one()
-    tweet_data = await request.json()
-
-    tweet_content = tweet_data.get('tweet_data')
-    attachments_ids = tweet_data.get('tweet_media_ids')
-    attachments_query = select(Media).filter(Media.id.in_(attachments_ids))
-    attachments = await db.execute(attachments_query)
-    images = attachments.unique().scalars().all()
-    images_urls = [media.url for media in images]
-
-    new_post = Post(
-        content=tweet_content, user_id=current_user.id, attachments=images_urls,
-    )
-    new_post.images.extend(images)
-    for image in images:
-        image.post = new_post
+    current_user = await get_user_by_filter(db=db, api_key=api_key)
+    new_post = Post(content=tweet.tweet_data, user_id=current_user.id)
     db.add(new_post)
+    await db.flush()
+
+    if tweet.tweet_media_ids:
+        await db.execute(
+            ATTACH_MEDIA_QUERY,
+            {'media_ids': tweet.tweet_media_ids, 'attached_post_id': new_post.id},
+        )
     await db.commit()
+    await invalidate_cache(TWEETS_CACHE_KEY)
     new_tweet_response = {'tweet_id': new_post.id}
     return {**SUCCESS_RESPONSE, **new_tweet_response}
 
@@ -349,22 +572,26 @@ async def delete_tweet(id: int, db: AsyncSession = DEFAULT_DB, api_key: str = De
     Delete desired tweet.
 
     Parameters:
+        id (int): The id of the desired tweet.
         db (AsyncSession): Session with the current database.
         api_key (str): The API key of the current user.
 
     Returns:
         Response object containing successful result status.
+
+    Note:
+        The tweet is deleted only if it belongs to the current user. When nothing
+        is deleted, the user and the tweet are looked up to report the reason.
     """
-    current_user, current_tweet = await get_user_and_tweet(
-        tweet_id=id, user_api_key=api_key, db=db,
+    deleted_tweet = await db.execute(
+        DELETE_OWN_TWEET_QUERY, {'tweet_id': id, 'api_key': api_key},
     )
-
-    if current_tweet.user_id != current_user.id:
+    if deleted_tweet.scalar_one_or_none() is None:
+        await get_user_and_tweet(tweet_id=id, user_api_key=api_key, db=db)
         raise HTTPException(status_code=HTTP_STATUS_FORBIDDEN, detail='Forbidden')
 
-    await db.delete(current_tweet)
     await db.commit()
-    await db.invalidate()
+    await invalidate_cache(TWEETS_CACHE_KEY)
     return SUCCESS_RESPONSE
 
 
@@ -384,18 +611,21 @@ async def like_tweet(id: int, db: AsyncSession = DEFAULT_DB, api_key: str = Depe
     current_user, current_tweet = await get_user_and_tweet(
         tweet_id=id, user_api_key=api_key, db=db,
     )
-    like = Like(user_id=current_user.id, post_id=current_tweet.id)
-    db.add(like)
-    try:
-        await db.commit()
-
-    except IntegrityError:
+    query = (
+        pg_insert(Like)
+        .values(user_id=current_user.id, post_id=current_tweet.id)
+        .on_conflict_do_nothing(index_elements=['user_id', 'post_id'])
+        .returning(Like.id)
+    )
+    new_like = await db.execute(query)
+    if new_like.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=HTTP_STATUS_NOT_FOUND,
             detail='You have already liked this tweet',
         )
 
-    await db.invalidate()
+    await db.commit()
+    await invalidate_cache(TWEETS_CACHE_KEY)
     return SUCCESS_RESPONSE
 
 
@@ -416,18 +646,20 @@ async def unlike_tweet(id: int, db: AsyncSession = DEFAULT_DB, api_key: str = De
         tweet_id=id, user_api_key=api_key, db=db,
     )
 
-    query = select(Like).filter_by(user_id=current_user.id, post_id=current_tweet.id)
-    like = await db.execute(query)
-    current_like = like.unique().scalar_one_or_none()
-    if not current_like:
+    query = (
+        delete(Like)
+        .where(Like.user_id == current_user.id, Like.post_id == current_tweet.id)
+        .returning(Like.id)
+    )
+    deleted_like = await db.execute(query)
+    if deleted_like.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=HTTP_STATUS_NOT_FOUND,
             detail='Like not found',
         )
 
-    await db.delete(current_like)
     await db.commit()
-    await db.invalidate()
+    await invalidate_cache(TWEETS_CACHE_KEY)
     return SUCCESS_RESPONSE
 
 
@@ -447,19 +679,30 @@ async def follow(id: int, db: AsyncSession = DEFAULT_DB, api_key: str = Depends(
     current_user, follower = await get_followers(
         db=db, current_user_api_key=api_key, follower_id=id,
     )
-    subscription = Subscription(follower_id=current_user.id, following_id=follower.id)
-    db.add(subscription)
-    try:
-        await db.commit()
+    if current_user.id == follower.id:
+        raise HTTPException(
+            status_code=HTTP_STATUS_BAD_REQUEST,
+            detail='You cannot subscribe to yourself',
+        )
 
-    except IntegrityError:
-        await db.rollback()
+    query = (
+        pg_insert(Subscription)
+        .values(follower_id=current_user.id, following_id=follower.id)
+        .on_conflict_do_nothing(index_elements=['follower_id', 'following_id'])
+        .returning(Subscription.id)
+    )
+    new_subscription = await db.execute(query)
+    if new_subscription.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=HTTP_STATUS_BAD_REQUEST,
             detail='You have already subscribed to this user',
         )
 
-    await db.invalidate()
+    await db.commit()
+    await invalidate_cache(
+        USER_CACHE_KEY.format(user_id=current_user.id),
+        USER_CACHE_KEY.format(user_id=follower.id),
+    )
     return SUCCESS_RESPONSE
 
 
@@ -480,18 +723,24 @@ async def unfollow(id: int, db: AsyncSession = DEFAULT_DB, api_key: str = Depend
     current_user, follower = await get_followers(
         db=db, current_user_api_key=api_key, follower_id=id,
     )
-    query = select(Subscription).filter_by(
-        follower_id=current_user.id, following_id=follower.id,
+    query = (
+        delete(Subscription)
+        .where(
+            Subscription.follower_id == current_user.id,
+            Subscription.following_id == follower.id,
+        )
+        .returning(Subscription.id)
     )
-    subscription = await db.execute(query)
-    current_subscription = subscription.unique().scalar_one_or_none()
-    if not current_subscription:
+    deleted_subscription = await db.execute(query)
+    if deleted_subscription.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=HTTP_STATUS_NOT_FOUND,
             detail='Subscription not found',
         )
 
-    await db.delete(current_subscription)
     await db.commit()
-    await db.invalidate()
+    await invalidate_cache(
+        USER_CACHE_KEY.format(user_id=current_user.id),
+        USER_CACHE_KEY.format(user_id=follower.id),
+    )
     return SUCCESS_RESPONSE
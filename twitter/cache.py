@@ -0,0 +1,87 @@
+import os
+from typing import Any, Optional
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from utils import logger
+
+CACHE_TTL = 60
+TWEETS_CACHE_TTL = 15
+CACHE_PREFIX = 'tw:'
+TWEETS_CACHE_KEY = CACHE_PREFIX + 'tweets'
+USER_CACHE_KEY = CACHE_PREFIX + 'user:{user_id}'
+
+
+def get_redis_client() -> Optional[Redis]:
+    """Get a Redis client if the response cache is configured, otherwise None."""
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        return None
+    return Redis.from_url(redis_url)
+
+
+redis_client = get_redis_client()
+
+
+async def get_cached(key: str) -> Optional[bytes]:
+    """
+    Get a cached response by its key.
+
+    Parameters:
+        key (str): The cache key of the response.
+
+    Returns:
+        Serialized JSON response or None if it is missing or the cache is unavailable.
+
+    Note:
+        The bytes are returned as is, so the endpoint can send them
+        without decoding and validating the response again.
+    """
+    if redis_client is None:
+        return None
+    try:
+        return await redis_client.get(key)
+    except RedisError as exc:
+        logger.warning("Cache read failed for %s: %s", key, exc)
+        return None
+
+
+async def set_cached(key: str, response: Any, expire: int = CACHE_TTL) -> None:
+    """
+    Save a response to the cache.
+
+    Parameters:
+        key (str): The cache key of the response.
+        response (Any): JSON-serializable response content or already serialized bytes.
+        expire (int): Time to live of the cached response in seconds.
+    """
+    if redis_client is None:
+        return
+    if not isinstance(response, bytes):
+        response = orjson.dumps(response)
+    try:
+        await redis_client.set(key, response, ex=expire)
+    except RedisError as exc:
+        logger.warning("Cache write failed for %s: %s", key, exc)
+
+
+async def invalidate_cache(*keys: str) -> None:
+    """
+    Delete cached responses after the data behind them has changed.
+
+    Parameters:
+        keys (str): The cache keys to delete.
+    """
+    if redis_client is None or not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except RedisError as exc:
+        logger.warning("Cache invalidation failed for %s: %s", keys, exc)
+
+
+async def close_cache() -> None:
+    """Close the connection pool of the Redis client."""
+    if redis_client is not None:
+        await redis_client.aclose()
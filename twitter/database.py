@@ -1,6 +1,7 @@
 import os
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 
 def get_database_url():
@@ -19,8 +20,28 @@ def get_database_url():
         return os.getenv("DATABASE_URL")
 
 
-echo_value = bool(os.environ.get("ECHO"))
-engine = create_async_engine(get_database_url(), echo=echo_value)
+echo_value = os.environ.get("ECHO", "").lower() in ("1", "true", "yes")
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+POOL_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+POOL_RECYCLE_SECONDS = 1800
+QUERY_CACHE_SIZE = 1200
+PREPARED_STATEMENT_CACHE_SIZE = 2048
+
+engine = create_async_engine(
+    get_database_url(),
+    echo=echo_value,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=POOL_SIZE,
+    max_overflow=POOL_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=POOL_RECYCLE_SECONDS,
+    pool_use_lifo=True,
+    query_cache_size=QUERY_CACHE_SIZE,
+    connect_args={
+        "prepared_statement_cache_size": PREPARED_STATEMENT_CACHE_SIZE,
+        "server_settings": {"jit": "off"},
+    },
+)
 SessionLocal = async_sessionmaker(
     engine, expire_on_commit=False,
     class_=AsyncSession,
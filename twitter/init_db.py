@@ -1,16 +1,20 @@
-from datetime import datetime, timedelta
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
 import random
 from typing import Sequence
 
 from faker import Faker
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
-from models import Like, Post, Subscription, User
+from sqlalchemy import func, text
+from database import Base, SessionLocal, engine
+from models import API_KEY_LENGTH, Like, Media, Post, Subscription, User
 
 fake = Faker()
 INITIAL_USERS_COUNT = 10
+SEED_ENVIRONMENTS = {'debug', 'test'}
 MAX_CONTENT_LENGTH = 280
 
 
@@ -22,47 +26,44 @@ async def create_users(session: AsyncSession) -> Sequence[User]:
     ]
 
     session.add_all(insert_users)
+    await session.flush()
+    return insert_users
 
-    select_users = await session.execute(select(User))
-    users = select_users.unique().scalars().all()
-    return users
 
-
-async def create_subscription(user: User, session: AsyncSession) -> None:
+async def create_subscriptions(users: Sequence[User], session: AsyncSession) -> None:
     """Function to fill database with fake initial subscriptions."""
-    number_subscription = random.randint(1, 5)
-    random_subscription = random.sample(range(1, 11), number_subscription)
-    for sub_id in random_subscription:
-        if user.id != sub_id:
-            subscription = Subscription(
-                follower_id=user.id,
-                following_id=sub_id,
-            )
-            try:
-                session.add(subscription)
-            except IntegrityError:
-                await session.rollback()
-                continue
-
-
-async def create_posts(user: User, session: AsyncSession) -> None:
+    subscriptions = [
+        (user.id, sub_id)
+        for user in users
+        for sub_id in random.sample(range(1, 11), random.randint(1, 5))
+        if user.id != sub_id
+    ]
+    await Subscription.bulk_create(session, subscriptions)
+
+
+async def create_posts(users: Sequence[User], session: AsyncSession) -> Sequence[Post]:
     """Function to fill database with fake initial posts."""
-    random_created_at = datetime.now() - timedelta(
-        seconds=random.randint(1, 5),
-    )
-    post = Post(
-        content=fake.text(max_nb_chars=MAX_CONTENT_LENGTH),
-        user_id=user.id,
-        created_at=random_created_at,
-    )
-    session.add(post)
-
-
-async def create_likes(post: Post, session: AsyncSession) -> None:
+    posts = [
+        Post(
+            content=fake.text(max_nb_chars=MAX_CONTENT_LENGTH),
+            user_id=user.id,
+            created_at=datetime.now(timezone.utc) - timedelta(seconds=random.randint(1, 5)),
+        )
+        for user in users
+        for _ in range(random.randint(1, 5))
+    ]
+    session.add_all(posts)
+    return posts
+
+
+async def create_likes(users: Sequence[User], posts: Sequence[Post], session: AsyncSession) -> None:
     """Function to fill database with fake initial likes."""
-    for user_id in random.sample(range(1, 11), random.randint(1, INITIAL_USERS_COUNT)):
-        like = Like(user_id=user_id, post_id=post.id)
-        session.add(like)
+    likes = [
+        (user.id, post.id)
+        for user in users
+        for post in random.sample(posts, random.randint(1, len(posts)))
+    ]
+    await Like.bulk_create(session, likes)
 
 
 async def create_db(session: AsyncSession) -> None:
@@ -78,17 +79,173 @@ async def create_db(session: AsyncSession) -> None:
     if users_in_db.scalar_one() == 0:
 
         users = await create_users(session)
+        await create_subscriptions(users, session)
+        all_posts = await create_posts(users, session)
 
-        for user in users:
-            await create_subscription(user, session)
+        await session.flush()
+        await create_likes(users, all_posts, session)
 
-            for _ in range(random.randint(1, 5)):
-                await create_posts(user, session)
+    await session.commit()
 
-        select_posts = await session.execute(select(Post))
-        all_posts = select_posts.unique().scalars().all()
-        for post in all_posts:
-            await create_likes(post, session)
 
-    await session.commit()
+def upgrade_created_at(connection: Connection) -> None:
+    """
+    Function to make created_at columns of existing tables timezone-aware and filled in by the database.
+
+    Parameters:
+        connection (Connection): Connection with the current database.
+
+    Note:
+        Older tables store naive UTC timestamps without a default value, so new rows
+        would get NULL created_at. Only columns that differ from the models are altered.
+    """
+    columns = connection.execute(text(
+        "SELECT table_name, data_type, column_default, is_nullable "
+        "FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND column_name = 'created_at'",
+    ))
+    for table_name, data_type, column_default, is_nullable in columns.all():
+        if table_name not in Base.metadata.tables:
+            continue
+        changes = []
+        if data_type == 'timestamp without time zone':
+            changes.append("ALTER COLUMN created_at TYPE timestamptz USING created_at AT TIME ZONE 'UTC'")
+        if column_default is None:
+            changes.append('ALTER COLUMN created_at SET DEFAULT now()')
+        if is_nullable == 'YES':
+            changes.append('ALTER COLUMN created_at SET NOT NULL')
+        if not changes:
+            continue
+        table = connection.dialect.identifier_preparer.quote(table_name)
+        connection.execute(text(f'UPDATE {table} SET created_at = now() WHERE created_at IS NULL'))
+        connection.execute(text(f'ALTER TABLE {table} {", ".join(changes)}'))
+
+
+def upgrade_post_foreign_keys(connection: Connection) -> None:
+    """
+    Function to make likes and media files of existing tables deleted together with their post.
+
+    Parameters:
+        connection (Connection): Connection with the current database.
+
+    Note:
+        Tweets are deleted with a single DELETE that relies on ON DELETE CASCADE,
+        so foreign keys to the post table created without it are recreated.
+    """
+    preparer = connection.dialect.identifier_preparer
+    for model in (Like, Media):
+        table = preparer.quote(model.__tablename__)
+        constraints = connection.execute(
+            text(
+                "SELECT conname FROM pg_constraint "
+                "WHERE contype = 'f' AND conrelid = CAST(:table AS regclass) "
+                "AND confrelid = CAST('post' AS regclass) AND confdeltype <> 'c'",
+            ),
+            {'table': table},
+        )
+        for constraint_name in constraints.scalars().all():
+            constraint = preparer.quote(constraint_name)
+            connection.execute(text(
+                f'ALTER TABLE {table} DROP CONSTRAINT {constraint}, '
+                f'ADD CONSTRAINT {constraint} FOREIGN KEY (post_id) REFERENCES post (id) ON DELETE CASCADE',
+            ))
+
+
+def upgrade_post_attachments(connection: Connection) -> None:
+    """
+    Function to drop the attachments column that older post tables still have.
+
+    Parameters:
+        connection (Connection): Connection with the current database.
+
+    Note:
+        Links to attached media files are read from the media table,
+        the array column is no longer part of the Post model.
+    """
+    connection.execute(text('ALTER TABLE post DROP COLUMN IF EXISTS attachments'))
+
+
+def upgrade_api_key_length(connection: Connection) -> None:
+    """
+    Function to bound api_key of the existing user table to API_KEY_LENGTH characters.
+
+    Parameters:
+        connection (Connection): Connection with the current database.
+
+    Raises:
+        ValueError: If stored API keys are longer than API_KEY_LENGTH characters.
+
+    Note:
+        Older tables store api_key as unbounded varchar. The keys are checked
+        before the column is narrowed, so no key is truncated.
+    """
+    column_length = connection.scalar(text(
+        "SELECT character_maximum_length FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = 'user' AND column_name = 'api_key'",
+    ))
+    if column_length == API_KEY_LENGTH:
+        return
+    longest_key_length = connection.scalar(text('SELECT max(length(api_key)) FROM "user"'))
+    if longest_key_length is not None and longest_key_length > API_KEY_LENGTH:
+        raise ValueError(
+            f'API keys longer than {API_KEY_LENGTH} characters must be replaced before the upgrade',
+        )
+    connection.execute(text(f'ALTER TABLE "user" ALTER COLUMN api_key TYPE varchar({API_KEY_LENGTH})'))
+
+
+def upgrade_indexes(connection: Connection) -> None:
+    """
+    Function to create indexes of the models that are missing in existing tables.
+
+    Parameters:
+        connection (Connection): Connection with the current database.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def upgrade_schema(connection: Connection) -> None:
+    """
+    Function to bring tables created by older versions of the models up to date.
+
+    Parameters:
+        connection (Connection): Connection with the current database.
+
+    Note:
+        create_all only creates missing tables and never alters existing ones,
+        so every change to existing tables is applied here. Each step checks
+        the current schema first, so running it again changes nothing.
+    """
+    upgrade_created_at(connection)
+    upgrade_post_foreign_keys(connection)
+    upgrade_post_attachments(connection)
+    upgrade_api_key_length(connection)
+    upgrade_indexes(connection)
+
+
+async def init_database() -> None:
+    """
+    Function to create the database schema and fill it with initial data.
+
+    Note:
+        It is run once per deployment with `python init_db.py`
+        instead of on every start of every application worker.
+        The initial data is only created in the debug and test environments.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, checkfirst=True)
+        await conn.run_sync(upgrade_schema)
+    if os.environ.get('ENV') in SEED_ENVIRONMENTS:
+        async with SessionLocal() as session:
+            await create_db(session)
+
+
+async def main() -> None:
+    """Function to initialize the database as a standalone deployment step."""
+    await init_database()
+    await engine.dispose()
+
 
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,18 +1,21 @@
-from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Tuple
 from sqlalchemy import (
-    ARRAY,
     Column,
     DateTime,
+    Index,
     Integer,
     ForeignKey,
     String,
     UniqueConstraint,
+    func,
 )
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import relationship
 from database import Base
 
 MAX_CONTENT_LENGTH = 280
+API_KEY_LENGTH = 64
 
 
 class User(Base):
@@ -24,7 +27,7 @@ class User(Base):
         api_key (str): Unique API key for the user.
         name (str): Name of the user.
         created_at (datetime): Date and time when the user was created
-        (default to current UTC time).
+        (filled in by the database with the current time).
         followers (Relationship): Relationship with the subscription table,
         indicating users who are following this user.
         followings (Relationship): Relationship with the subscription table,
@@ -38,9 +41,9 @@ class User(Base):
     __tablename__ = 'user'
 
     id = Column(Integer, primary_key=True)
-    api_key = Column(String, unique=True, nullable=False)
+    api_key = Column(String(API_KEY_LENGTH), unique=True, nullable=False)
     name = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     followers = relationship(
         'Subscription',
         foreign_keys='Subscription.following_id',
@@ -58,25 +61,6 @@ class User(Base):
         """Method for displaying class attributes and their values as a dictionary."""
         return {'id': self.id, 'name': self.name}
 
-    @property
-    def formatted_data(self) -> Dict[str, Any]:
-        """
-        Property method to return user data in a formatted dictionary.
-
-        Returns:
-            dict:  A dictionary that contains complete information about the user,
-            including the names and IDs of the users to whom the current user is
-            subscribed and the names and IDs of the users who are subscribed
-            to the current user.
-
-        Note:
-            This response structure is necessary for correct display on the frontend.
-        """
-        user_data = self.to_dict()
-        user_data['followers'] = [subscription.follower.to_dict() for subscription in self.followers]
-        user_data['following'] = [subscription.following.to_dict() for subscription in self.followings]
-        return user_data
-
 
 class Subscription(Base):
     """
@@ -85,7 +69,7 @@ class Subscription(Base):
     Attributes:
         id (int): Identifier of the subscription.
         created_at (datetime): Date and time when the user was created
-        (default to current UTC time).
+        (filled in by the database with the current time).
         follower_id (int): The ID of the user who subscribed to another user
         following_id (int): The ID of the user that the other user subscribed to
         follower (Relationship): Relationship with the user table,
@@ -96,23 +80,44 @@ class Subscription(Base):
 
     __tablename__ = 'subscription'
     id = Column(Integer, primary_key=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     follower_id = Column(Integer, ForeignKey('user.id'))
     following_id = Column(Integer, ForeignKey('user.id'))
-    follower = relationship(
-        'User', foreign_keys=[follower_id], back_populates='followers', lazy='joined',
-    )
-    following = relationship(
-        'User', foreign_keys=[following_id], back_populates='followings', lazy='joined',
-    )
+    follower = relationship('User', foreign_keys=[follower_id], back_populates='followers')
+    following = relationship('User', foreign_keys=[following_id], back_populates='followings')
 
     __table_args__ = (
         UniqueConstraint(
             'follower_id', 'following_id', name='unique_follower_following',
         ),
+        Index('ix_subscription_following_follower', 'following_id', 'follower_id'),
     )
 
+    @classmethod
+    async def bulk_create(cls, session: AsyncSession, pairs: Iterable[Tuple[int, int]]) -> None:
+        """
+        Create several subscriptions with one executemany INSERT.
+
+        Parameters:
+            session (AsyncSession): Session with the current database.
+            pairs (Iterable[Tuple[int, int]]): Pairs of the follower ID and the following ID.
+
+        Note:
+            Existing subscriptions are skipped by ON CONFLICT DO NOTHING.
+            The rows are sent in batches, so any number of them stays
+            below the limit of query arguments in asyncpg.
+        """
+        values = [
+            {'follower_id': follower_id, 'following_id': following_id}
+            for follower_id, following_id in pairs
+        ]
+        if values:
+            await session.execute(
+                pg_insert(cls).on_conflict_do_nothing(index_elements=['follower_id', 'following_id']),
+                values,
+            )
+
 
 class Post(Base):
     """
@@ -121,9 +126,8 @@ class Post(Base):
     Attributes:
         id (int): Identifier of the subscription.
         created_at (datetime): Date and time when the user was created
-        (default to current UTC time).
+        (filled in by the database with the current time).
         content (str): Text content of the post.
-        attachments (ARRAY): A array that contains links to attached media files
         user_id (int): The ID of the user who posted this post.
         user (Relationship): Relationship with the user table,
         indicating users who posted this post.
@@ -135,40 +139,29 @@ class Post(Base):
 
     __tablename__ = 'post'
     id = Column(Integer, primary_key=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     content = Column(String(MAX_CONTENT_LENGTH))
-    attachments = Column(ARRAY(String))
     user_id = Column(Integer, ForeignKey('user.id'))
     user = relationship('User', back_populates='posts', lazy='joined')
     likes = relationship(
-        'Like', back_populates='post', lazy='joined', cascade='all, delete',
+        'Like',
+        back_populates='post',
+        lazy='selectin',
+        cascade='all, delete',
+        passive_deletes=True,
     )
     images = relationship(
-        'Media', back_populates='post', lazy='joined', cascade='all, delete',
+        'Media',
+        back_populates='post',
+        lazy='selectin',
+        cascade='all, delete',
+        passive_deletes=True,
     )
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Method for displaying class attributes and their values as a dictionary."""
-        return {col.name: getattr(self, col.name) for col in self.__table__.columns}
-
-    @property
-    def formatted_data(self) -> Dict[str, Any]:
-        """
-        Property method to return post data in a formatted dictionary.
-
-        Returns:
-            dict:  A dictionary that contains complete information about the post,
-            including likes given to this post, authors name and IDs of the users
-            who posted this post and attached media files.
-
-        Note:
-            This response structure is necessary for correct display on the frontend.
-        """
-        post_data = self.to_dict()
-        post_data['likes'] = [like.to_dict() for like in self.likes]
-        post_data['author'] = {'id': self.user.id, 'name': self.user.name}
-        post_data['attachments'] = [media.url for media in self.images]
-        return post_data
+    __table_args__ = (
+        Index('ix_post_created_at_id', created_at.desc(), id.desc()),
+        Index('ix_post_user_created', user_id, created_at.desc(), id.desc()),
+    )
 
 
 class Media(Base):
@@ -178,7 +171,7 @@ class Media(Base):
     Attributes:
         id (int): Identifier of the media file.
         created_at (datetime): Date and time when the user was created
-        (default to current UTC time).
+        (filled in by the database with the current time).
         url (str): The URL of the media file location.
         post_id (int): The ID of the post to which this media file is attached
         post (Relationship): Relationship with the post table,
@@ -188,10 +181,10 @@ class Media(Base):
     __tablename__ = 'media'
 
     id = Column(Integer, primary_key=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     url = Column(String, unique=True, nullable=False)
 
-    post_id = Column(Integer, ForeignKey('post.id'))
+    post_id = Column(Integer, ForeignKey('post.id', ondelete='CASCADE'), index=True)
     post = relationship('Post', back_populates='images', lazy='joined')
 
 
@@ -202,7 +195,7 @@ class Like(Base):
     Attributes:
         id (int): Identifier of the media file.
         created_at (datetime): Date and time when the user was created
-        (default to current UTC time).
+        (filled in by the database with the current time).
         user_id (int): The ID of the user who posted this like.
         user (Relationship): Relationship with the user table,
         indicating users who posted this like.
@@ -214,16 +207,34 @@ class Like(Base):
     __tablename__ = 'like'
 
     id = Column(Integer, primary_key=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     user_id = Column(Integer, ForeignKey('user.id'))
     user = relationship('User', back_populates='likes', lazy='joined')
-    post_id = Column(Integer, ForeignKey('post.id'))
+    post_id = Column(Integer, ForeignKey('post.id', ondelete='CASCADE'))
     post = relationship('Post', back_populates='likes', lazy='joined')
 
     __table_args__ = (
         UniqueConstraint('user_id', 'post_id', name='unique_user_post'),
+        Index('ix_like_post_user', 'post_id', 'user_id'),
     )
 
-    def to_dict(self):
-        """Method for displaying class attributes and their values as a dictionary."""
-        return {'user_id': self.user_id, 'name': self.user.name}
+    @classmethod
+    async def bulk_create(cls, session: AsyncSession, pairs: Iterable[Tuple[int, int]]) -> None:
+        """
+        Create several likes with one executemany INSERT.
+
+        Parameters:
+            session (AsyncSession): Session with the current database.
+            pairs (Iterable[Tuple[int, int]]): Pairs of the user ID and the liked post ID.
+
+        Note:
+            Existing likes are skipped by ON CONFLICT DO NOTHING.
+            The rows are sent in batches, so any number of them stays
+            below the limit of query arguments in asyncpg.
+        """
+        values = [{'user_id': user_id, 'post_id': post_id} for user_id, post_id in pairs]
+        if values:
+            await session.execute(
+                pg_insert(cls).on_conflict_do_nothing(index_elements=['user_id', 'post_id']),
+                values,
+            )
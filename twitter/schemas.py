@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
 from typing import List, Optional
 
 
@@ -29,12 +30,17 @@ class LikeBase(BaseModel):
 class PostOut(PostBase):
     """The Post model with all attributes for output endpoints."""
 
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
     author: UserBase = Field(description='Information about the author of this tweet')
     likes: Optional[List[LikeBase]] = Field(description='List of likes on this tweet')
 
-    class ConfigDict:
-        from_attributes = True
-        populate_by_name = True
+
+class PostCursor(BaseModel):
+    """Position of the last tweet on a feed page, the next page starts after it."""
+
+    before_created_at: datetime = Field(description='Creation time of the last tweet on the page')
+    before_id: int = Field(description='Unique ID of the last tweet on the page')
 
 
 class PostResponse(BaseModel):
@@ -44,11 +50,16 @@ class PostResponse(BaseModel):
     tweets: Optional[List[PostOut]] = Field(
         description='List of tweets for this user, from the most recent to the oldest',
     )
+    next_cursor: Optional[str] = Field(
+        default=None, description='Cursor of the next page of tweets, if there is one',
+    )
 
 
 class UserOut(UserBase):
     """The User model with all attributes for output endpoints."""
 
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
     followers: Optional[List[UserBase]] = Field(
         description='List of followers of this user',
     )
@@ -56,10 +67,6 @@ class UserOut(UserBase):
         description='List of users that the user follows',
     )
 
-    class ConfigDict:
-        from_attributes = True
-        populate_by_name = True
-
 
 class UserResponse(BaseModel):
     """The User model with all attributes in the required format for the frontend."""
@@ -80,6 +87,17 @@ class MediaResponse(SuccessfulResponse):
     media_id: int = Field(description='Unique ID of media file')
 
 
+class TweetIn(BaseModel):
+    """The Tweet model with attributes required to post a new tweet."""
+
+    model_config = ConfigDict(extra='forbid')
+
+    tweet_data: str = Field(description='The content of the new tweet')
+    tweet_media_ids: List[int] = Field(
+        default=[], description='IDs of uploaded media files attached to the new tweet',
+    )
+
+
 class TweetResponse(SuccessfulResponse):
     """The Tweet response with success response and additional tweet information."""
 
@@ -1,6 +1,13 @@
+import asyncio
+import atexit
 import logging
+import queue
+import reprlib
 import sys
 from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
+
+MAX_LOGGED_REPR_LENGTH = 200
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -8,15 +15,54 @@ logger_handler = logging.StreamHandler(stream=sys.stdout)
 logger_handler.setFormatter(logging.Formatter(
     fmt='[%(asctime)s: %(levelname)s] %(message)s',
 ))
-logger.addHandler(logger_handler)
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, logger_handler)
+logger.addHandler(QueueHandler(log_queue))
+log_listener.start()
+atexit.register(log_listener.stop)
+
+
+class _ShortRepr(reprlib.Repr):
+    """Repr that builds only a bounded part of large values for the logs."""
+
+    def __init__(self):
+        super().__init__()
+        self.maxlevel = 3
+        self.maxtuple = self.maxlist = self.maxset = self.maxfrozenset = 10
+        self.maxdeque = self.maxarray = self.maxdict = 10
+        self.maxstring = self.maxother = MAX_LOGGED_REPR_LENGTH
+        self.maxlong = MAX_LOGGED_REPR_LENGTH
+
+    def repr_bytes(self, value, level):
+        """Get the repr of bytes without copying the whole content."""
+        if len(value) > self.maxstring:
+            return repr(value[:self.maxstring]) + '...'
+        return repr(value)
+
+
+_short_repr = _ShortRepr().repr
 
 
 def log_function_calls(logger):
     def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            result = await func(*args, **kwargs)
-            logger.info(f"Function {func.__name__} executed with args: {args}, kwargs: {kwargs}. Result: {result}")
-            return result
+        def log_call(args, kwargs, result):
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Function %s executed with args: %s, kwargs: %s. Result: %s",
+                    func.__name__, _short_repr(args), _short_repr(kwargs), _short_repr(result),
+                )
+
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                result = await func(*args, **kwargs)
+                log_call(args, kwargs, result)
+                return result
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                result = func(*args, **kwargs)
+                log_call(args, kwargs, result)
+                return result
         return wrapper
     return decorator